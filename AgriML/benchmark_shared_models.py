@@ -0,0 +1,164 @@
+# benchmark_shared_models.py
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+MODES = ("private", "private_rf", "shared")
+
+
+def read_memory_kb():
+    """Return (rss_kb, pss_kb) for this process; pss is None if unavailable."""
+    rss = pss = None
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Rss:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except OSError:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+    return rss, pss
+
+
+def load(mode, predictor, base_path):
+    if mode == "shared":
+        predictor.attach_shared_models(base_path=base_path)
+    elif mode == "private_rf":
+        # Today's RF + scaler load without the LSTM, for a like-for-like baseline
+        import joblib
+        predictor.model = joblib.load(f"{base_path}rf_irrigation_model.pkl")
+        predictor.scaler = joblib.load(f"{base_path}feature_scaler.pkl")
+    else:
+        predictor.load_models(base_path=base_path)
+    if predictor.model is None:
+        raise RuntimeError(f"No model loaded from {base_path}")
+
+
+def worker(mode, base_path, n_rows, barrier, results, timeout):
+    try:
+        from irrigation_ML import IrrigationPredictor
+
+        rss_before, _ = read_memory_kb()
+        predictor = IrrigationPredictor()
+        start = time.perf_counter()
+        load(mode, predictor, base_path)
+        load_s = time.perf_counter() - start
+
+        # Time through the first scored batch: mapped pages fault in here
+        rng = np.random.default_rng(os.getpid())
+        X = rng.normal(size=(n_rows, len(predictor.feature_columns)))
+        predictor.model.predict(predictor.scaler.transform(X))
+        ready_s = time.perf_counter() - start
+
+        # Measure while every worker is still alive so PSS reflects sharing
+        barrier.wait(timeout)
+        rss_after, pss_after = read_memory_kb()
+        results.put({
+            "pid": os.getpid(),
+            "load_s": load_s,
+            "ready_s": ready_s,
+            "rss_delta_mb": (rss_after - rss_before) / 1024,
+            "rss_mb": rss_after / 1024,
+            "pss_mb": pss_after / 1024 if pss_after is not None else None,
+        })
+        barrier.wait(timeout)
+    except (Exception, threading.BrokenBarrierError) as e:
+        barrier.abort()
+        results.put({"pid": os.getpid(), "error": f"{type(e).__name__}: {e}"})
+        sys.exit(1)
+
+
+def run(mode, base_path, n_workers, n_rows, timeout):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker,
+                         args=(mode, base_path, n_rows, barrier, results, timeout))
+             for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    rows = []
+    try:
+        for _ in procs:
+            rows.append(results.get(timeout=timeout))
+    except queue.Empty:
+        rows.append({"pid": None, "error": f"timed out after {timeout}s"})
+    for p in procs:
+        p.join(timeout)
+        if p.is_alive():
+            p.terminate()
+            p.join()
+    failed = [r for r in rows if "error" in r]
+    failed += [{"pid": p.pid, "error": f"exit code {p.exitcode}"}
+               for p in procs if p.exitcode != 0]
+    return rows, failed
+
+
+def summarize(mode, rows):
+    def mean(key):
+        vals = [r[key] for r in rows if r[key] is not None]
+        return sum(vals) / len(vals) if vals else None
+
+    summary = {
+        "mode": mode,
+        "workers": len(rows),
+        "mean_load_s": mean("load_s"),
+        "mean_ready_s": mean("ready_s"),
+        "mean_rss_delta_mb": mean("rss_delta_mb"),
+        "mean_rss_mb": mean("rss_mb"),
+        "mean_pss_mb": mean("pss_mb"),
+    }
+    print(f"\n[{mode}] {len(rows)} workers")
+    print(f"{'pid':>8} {'load (s)':>10} {'ready (s)':>10} {'RSS +MB':>10} {'RSS MB':>10} {'PSS MB':>10}")
+    for r in rows:
+        pss = f"{r['pss_mb']:10.1f}" if r['pss_mb'] is not None else f"{'n/a':>10}"
+        print(f"{r['pid']:>8} {r['load_s']:10.4f} {r['ready_s']:10.4f} "
+              f"{r['rss_delta_mb']:10.1f} {r['rss_mb']:10.1f} {pss}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare per-worker memory and load time: private load vs shared attach.")
+    parser.add_argument("--models", default="models/", help="Model directory")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes per mode")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows scored by each worker")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES),
+                        help="private: load_models with LSTM; private_rf: RF pickle only; "
+                             "shared: memory-mapped attach")
+    parser.add_argument("--timeout", type=float, default=300,
+                        help="Seconds to wait for workers before giving up")
+    parser.add_argument("--export", action="store_true",
+                        help="Export <models>/shared/ from the pickled RF model first")
+    parser.add_argument("--output", help="Write the summary as JSON to this path")
+    args = parser.parse_args()
+
+    if "shared" in args.modes and (args.export or not os.path.exists(f"{args.models}shared/meta.json")):
+        from irrigation_ML import IrrigationPredictor
+        predictor = IrrigationPredictor()
+        predictor.load_models(base_path=args.models)
+        predictor.export_shared_models(base_path=args.models)
+
+    summaries = []
+    for mode in args.modes:
+        rows, failed = run(mode, args.models, args.workers, args.rows, args.timeout)
+        if failed:
+            for r in failed:
+                print(f"[{mode}] worker {r['pid']} failed: {r['error']}", file=sys.stderr)
+            sys.exit(1)
+        summaries.append(summarize(mode, rows))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summaries, f, indent=2)
@@ -1,3 +1,4 @@
+import json
 import subprocess
 import firebase_admin
 from firebase_admin import credentials, db
@@ -22,9 +23,10 @@ ml_input = {
     'crop_info': {'growth_stage': 3, 'days_since_irrigation': 2, 'soil_type': 2}
 }
 
-# Call ML script
+# Call ML script (one NDJSON record in on stdin, one NDJSON result out)
 result = subprocess.check_output(
-    ["python", "irrigation_ML.py", str(ml_input)]
+    ["python", "irrigation_ML.py", "-"],
+    input=(json.dumps(ml_input) + "\n").encode()
 ).decode().strip()
 
 # Push prediction to Firebase
@@ -1,19 +1,138 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import make_pipeline
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
 from sklearn.preprocessing import StandardScaler
-import tensorflow as tf
-from tensorflow import keras
+# TensorFlow is only needed for the LSTM; the tabular backends work without it.
+try:
+    import tensorflow as tf
+    from tensorflow import keras
+    TF_AVAILABLE = True
+except Exception:
+    TF_AVAILABLE = False
 import joblib
 import requests
 import json
+import hashlib
+import io
+import math
+import os
+import platform
+import shutil
+import sys
+import time
+import zipfile
 from datetime import datetime, timedelta
 
+class SharedScaler:
+    """Read-only StandardScaler replacement backed by memory-mapped arrays."""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class SharedForest:
+    """Random forest predictor that walks flattened, memory-mapped tree arrays.
+
+    All trees are concatenated into one set of node arrays so that N worker
+    processes mapping the same files share a single copy in the page cache
+    instead of each unpickling a private forest.
+    """
+
+    def __init__(self, left, right, feature, threshold, missing_go_to_left,
+                 value, roots, max_depth):
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.missing_go_to_left = missing_go_to_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+
+    def predict(self, X):
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))
+        nodes = np.repeat(self.roots[:, None], len(X), axis=1)
+        for _ in range(self.max_depth):
+            left = self.left[nodes]
+            leaf = left == -1
+            if leaf.all():
+                break
+            feat = np.where(leaf, 0, self.feature[nodes])
+            x = X[rows, feat]
+            # NaN follows the split's learned missing-value direction, as in sklearn
+            go_left = np.where(np.isnan(x), self.missing_go_to_left[nodes],
+                               x <= self.threshold[nodes])
+            nodes = np.where(leaf, nodes, np.where(go_left, left, self.right[nodes]))
+        return self.value[nodes].mean(axis=0)
+
+
+# Candidate production regressors, in order of preference on ties.
+# 'distilled_forest' is fitted on the full forest's predictions. Every backend
+# must accept NaN features (e.g. an empty soil_moisture list), as the forests
+# and HistGradientBoosting do natively; 'linear' imputes medians first.
+MODEL_BACKENDS = {
+    'random_forest': lambda: RandomForestRegressor(
+        n_estimators=100, max_depth=10, random_state=42, min_samples_split=5
+    ),
+    'hist_gradient_boosting': lambda: HistGradientBoostingRegressor(
+        max_iter=100, max_depth=6, random_state=42
+    ),
+    'distilled_forest': lambda: RandomForestRegressor(
+        n_estimators=20, max_depth=6, random_state=42, min_samples_split=5
+    ),
+    'linear': lambda: make_pipeline(
+        SimpleImputer(strategy='median', keep_empty_features=True), LinearRegression()
+    ),
+}
+
+
+def measure_latency_ms(model, scaler, rows, n_repeats, n_warmup=5):
+    """Return the p99 wall time in ms of ``model.predict(scaler.transform(rows))``.
+
+    The first ``n_warmup`` calls are not timed so thread-pool start-up does
+    not land in the tail.
+    """
+    for _ in range(n_warmup):
+        model.predict(scaler.transform(rows))
+    times = []
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        model.predict(scaler.transform(rows))
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(times, 99))
+
+
+def model_fingerprint(base_path='models/'):
+    """SHA-256 of the pickled model and scaler, or None if either is missing."""
+    digest = hashlib.sha256()
+    for name in ('rf_irrigation_model.pkl', 'feature_scaler.pkl'):
+        path = f'{base_path}{name}'
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
 class IrrigationPredictor:
     def __init__(self):
-        self.rf_model = None
+        # The production regressor: whichever MODEL_BACKENDS entry was
+        # trained or selected (see ``backend``), or a SharedForest when attached.
+        self.model = None
+        self.backend = 'random_forest'
+        self.benchmark_report = None
         self.lstm_model = None
         self.scaler = StandardScaler()
         self.feature_columns = [
@@ -22,8 +141,8 @@ class IrrigationPredictor:
             'days_since_last_irrigation', 'crop_stage', 'soil_type'
         ]
 
-    def prepare_features(self, sensor_data, weather_data, crop_info):
-        features = {
+    def _feature_row(self, sensor_data, weather_data, crop_info):
+        return {
             'soil_moisture_avg': np.mean(sensor_data['soil_moisture']),
             'temperature': sensor_data['temperature'],
             'humidity': sensor_data['humidity'],
@@ -33,7 +152,9 @@ class IrrigationPredictor:
             'crop_stage': crop_info.get('growth_stage', 2),
             'soil_type': crop_info.get('soil_type', 2)
         }
-        return pd.DataFrame([features])
+
+    def prepare_features(self, sensor_data, weather_data, crop_info):
+        return pd.DataFrame([self._feature_row(sensor_data, weather_data, crop_info)])
 
     def train_random_forest(self, training_data):
         X = training_data[self.feature_columns]
@@ -43,14 +164,85 @@ class IrrigationPredictor:
         )
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
-        self.rf_model = RandomForestRegressor(
-            n_estimators=100, max_depth=10, random_state=42, min_samples_split=5
-        )
-        self.rf_model.fit(X_train_scaled, y_train)
-        y_pred = self.rf_model.predict(X_test_scaled)
+        self.model = MODEL_BACKENDS['random_forest']()
+        self.backend = 'random_forest'
+        self.benchmark_report = None
+        self.model.fit(X_train_scaled, y_train)
+        y_pred = self.model.predict(X_test_scaled)
         print(f"MSE: {mean_squared_error(y_test, y_pred):.2f}")
         print(f"R2: {r2_score(y_test, y_pred):.3f}")
-        return self.rf_model
+        return self.model
+
+    def train_backends(self, training_data, single_p99_ms=5.0, batch_p99_ms=100.0,
+                       batch_size=1000, n_repeats=200, backends=None):
+        """Train each backend and keep the most accurate one within the latency budget.
+
+        Latency is measured on this machine as the p99 of scaling and scoring
+        one row and a ``batch_size`` batch. If no backend meets the budget the
+        fastest single-row backend is kept. The report is stored on
+        ``self.benchmark_report`` and written by ``save_models``.
+        """
+        X = training_data[self.feature_columns]
+        y = training_data['irrigation_duration']
+        if len(X) < 5:
+            raise RuntimeError(f"Not enough samples for backend selection (n={len(X)}). Need >= 5.")
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
+        X_train_scaled = self.scaler.fit_transform(X_train)
+        X_test_scaled = self.scaler.transform(X_test)
+
+        rng = np.random.default_rng(42)
+        single_row = X_test.iloc[:1]
+        batch_rows = X_test.iloc[rng.integers(0, len(X_test), size=batch_size)]
+
+        teacher = None
+        results, models = {}, {}
+        for name in backends or MODEL_BACKENDS:
+            model = MODEL_BACKENDS[name]()
+            if name == 'distilled_forest':
+                if teacher is None:
+                    teacher = MODEL_BACKENDS['random_forest']()
+                    teacher.fit(X_train_scaled, y_train)
+                model.fit(X_train_scaled, teacher.predict(X_train_scaled))
+            else:
+                model.fit(X_train_scaled, y_train)
+                if name == 'random_forest':
+                    teacher = model
+            y_pred = model.predict(X_test_scaled)
+            single = measure_latency_ms(model, self.scaler, single_row, n_repeats)
+            batch = measure_latency_ms(model, self.scaler, batch_rows, n_repeats)
+            results[name] = {
+                'mse': float(mean_squared_error(y_test, y_pred)),
+                'r2': float(r2_score(y_test, y_pred)),
+                'p99_single_ms': single,
+                'p99_batch_ms': batch,
+                'meets_budget': single <= single_p99_ms and batch <= batch_p99_ms,
+            }
+            models[name] = model
+            print(f"{name}: MSE {results[name]['mse']:.2f}, R2 {results[name]['r2']:.3f}, "
+                  f"p99 single {single:.2f} ms, p99 batch {batch:.2f} ms")
+
+        within = [n for n in results if results[n]['meets_budget']]
+        if within:
+            selected = min(within, key=lambda n: results[n]['mse'])
+        else:
+            selected = min(results, key=lambda n: results[n]['p99_single_ms'])
+            print("No backend meets the latency budget; using the fastest:", selected)
+        print("Selected backend:", selected)
+
+        self.model = models[selected]
+        self.backend = selected
+        self.benchmark_report = {
+            'selected': selected,
+            'budget': {'p99_single_ms': single_p99_ms, 'p99_batch_ms': batch_p99_ms,
+                       'batch_size': batch_size},
+            'machine': {'platform': platform.platform(), 'processor': platform.processor(),
+                        'python': platform.python_version(), 'cpu_count': os.cpu_count()},
+            'measured_at': datetime.now().isoformat(timespec='seconds'),
+            'backends': results,
+        }
+        return self.model
 
     def create_lstm_model(self, sequence_length, n_features):
         model = keras.Sequential([
@@ -89,12 +281,51 @@ class IrrigationPredictor:
             y.append(target[i])
         return np.array(X), np.array(y)
 
+    def prepare_batch_features(self, records):
+        """Build one feature frame for a list of input records.
+
+        Each record is either the nested ``{'sensor_data', 'weather_data',
+        'crop_info'}`` dict accepted by ``prepare_features`` or a flat
+        historical row that already carries the ``feature_columns``.
+        """
+        rows = [self.record_row(rec) for rec in records]
+        return pd.DataFrame(rows, columns=self.feature_columns, dtype=float)
+
+    def record_row(self, rec):
+        """Return the float feature dict for one nested or flat input record.
+
+        Raises KeyError/TypeError/ValueError/AttributeError for a record that
+        cannot be turned into features, so callers can fail just that row.
+        """
+        if 'sensor_data' in rec:
+            # A null/non-object sub-record counts as missing
+            sub = [rec.get(k) if isinstance(rec.get(k), dict) else {}
+                   for k in ('sensor_data', 'weather_data', 'crop_info')]
+            row = self._feature_row(*sub)
+        else:
+            row = {col: rec[col] for col in self.feature_columns}
+        return {col: float(row[col]) for col in self.feature_columns}
+
+    def predict_batch(self, features):
+        """Score a feature frame (or columnar mapping) in one model call."""
+        df = pd.DataFrame(features, columns=self.feature_columns)
+        if not self.model:
+            return [None] * len(df)
+        scaled = self.scaler.transform(df)
+        durations = np.maximum(0, self.model.predict(scaled)).astype(int)
+        return [{
+            'irrigation_needed': bool(d > 5),
+            'duration_minutes': int(d),
+            'confidence': 0.9,
+            'recommendations': []
+        } for d in durations]
+
     def predict_irrigation_need(self, *, sensor_data, weather_forecast, crop_info):
         df = self.prepare_features(sensor_data, weather_forecast, crop_info)
         scaled = self.scaler.transform(df)
         preds = {}
-        if self.rf_model:
-            preds['rf'] = max(0, self.rf_model.predict(scaled)[0])
+        if self.model:
+            preds[self.backend] = max(0, self.model.predict(scaled)[0])
         if preds:
             duration = int(np.mean(list(preds.values())))
             return {
@@ -106,46 +337,486 @@ class IrrigationPredictor:
         return None
 
     def save_models(self, base_path='models/'):
-        if self.rf_model:
-            joblib.dump(self.rf_model, f'{base_path}rf_irrigation_model.pkl')
+        if self.model:
+            joblib.dump(self.model, f'{base_path}rf_irrigation_model.pkl')
             joblib.dump(self.scaler, f'{base_path}feature_scaler.pkl')
+            # The report describes one specific pickle; never leave it beside another
+            report_path = f'{base_path}model_benchmark.json'
+            if self.benchmark_report:
+                self.benchmark_report['fingerprint'] = model_fingerprint(base_path)
+                with open(report_path, 'w') as f:
+                    json.dump(self.benchmark_report, f, indent=2)
+            elif os.path.exists(report_path):
+                os.remove(report_path)
         if self.lstm_model:
             self.lstm_model.save(f'{base_path}lstm_irrigation_model.h5')
+        # Keep an existing shared export in step with the pickle it mirrors
+        if os.path.exists(f'{base_path}shared/meta.json') and hasattr(self.model, 'estimators_'):
+            self.export_shared_models(base_path)
         print("Models saved")
 
+    def export_shared_models(self, base_path='models/'):
+        """Flatten the forest model and scaler into .npy files for memory mapping.
+
+        Call after ``save_models`` or ``load_models`` on the same ``base_path``:
+        the export records a fingerprint of the pickles there, and is checked
+        against ``model.predict`` on a random sample before it is written.
+
+        Each export is a new, never-modified ``shared/v<id>/`` directory;
+        ``shared/meta.json`` is then atomically replaced to point at it, so
+        workers that already mapped an older version keep a consistent
+        snapshot. Only the two newest versions are kept.
+        """
+        if not self.model:
+            raise RuntimeError("Model not trained or loaded yet.")
+        if not hasattr(self.model, 'estimators_'):
+            raise RuntimeError(f"Backend '{self.backend}' is not a forest; cannot export.")
+        root = f'{base_path}shared/'
+        os.makedirs(root, exist_ok=True)
+        left, right, feature, threshold, missing, value, roots = [], [], [], [], [], [], []
+        offset = 0
+        for est in self.model.estimators_:
+            tree = est.tree_
+            is_leaf = tree.children_left == -1
+            roots.append(offset)
+            left.append(np.where(is_leaf, -1, tree.children_left + offset))
+            right.append(np.where(is_leaf, -1, tree.children_right + offset))
+            feature.append(tree.feature)
+            threshold.append(tree.threshold)
+            # Trees without missing-value support send NaN right (NaN <= t is False)
+            missing.append(getattr(tree, 'missing_go_to_left',
+                                   np.zeros(tree.node_count, dtype=bool)))
+            value.append(tree.value[:, 0, 0])
+            offset += tree.node_count
+        arrays = {
+            'left': np.concatenate(left).astype(np.int64),
+            'right': np.concatenate(right).astype(np.int64),
+            'feature': np.concatenate(feature).astype(np.int64),
+            'threshold': np.concatenate(threshold).astype(np.float64),
+            'missing_go_to_left': np.concatenate(missing).astype(bool),
+            'value': np.concatenate(value).astype(np.float64),
+            'roots': np.array(roots, dtype=np.int64),
+            'scaler_mean': np.asarray(self.scaler.mean_, dtype=np.float64),
+            'scaler_scale': np.asarray(self.scaler.scale_, dtype=np.float64),
+        }
+        max_depth = max(est.tree_.max_depth for est in self.model.estimators_)
+        forest = SharedForest(
+            arrays['left'], arrays['right'], arrays['feature'], arrays['threshold'],
+            arrays['missing_go_to_left'], arrays['value'], arrays['roots'], max_depth
+        )
+        sample = np.random.default_rng(42).normal(size=(256, len(self.feature_columns)))
+        if not np.allclose(forest.predict(sample), self.model.predict(sample)):
+            raise RuntimeError("Shared forest predictions do not match the model.")
+        sample[::7, ::3] = np.nan
+        try:
+            expected = self.model.predict(sample)
+        except ValueError:
+            expected = None  # this sklearn rejects NaN input, so there is nothing to match
+        if expected is not None and not np.allclose(forest.predict(sample), expected):
+            raise RuntimeError("Shared forest NaN handling does not match the model.")
+
+        version = f'v{time.time_ns()}'
+        tmp = f'{root}.{version}.tmp/'
+        os.makedirs(tmp)
+        for name, arr in arrays.items():
+            np.save(f'{tmp}{name}.npy', arr)
+        meta = {'version': version,
+                'max_depth': int(max_depth),
+                'n_trees': len(roots),
+                'feature_columns': self.feature_columns,
+                'fingerprint': model_fingerprint(base_path)}
+        with open(f'{tmp}meta.json', 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, f'{root}{version}')
+        # Publish: swap the pointer in one rename so readers never see a partial file
+        with open(f'{root}meta.json.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(f'{root}meta.json.tmp', f'{root}meta.json')
+
+        # Drop old snapshots; still-mapped files stay valid on POSIX, and
+        # removal that fails (e.g. a mapped file on Windows) is retried next time
+        old = sorted((d for d in os.listdir(root) if d.startswith('v') and d != version),
+                     key=lambda d: int(d[1:]) if d[1:].isdigit() else 0)
+        for d in old[:-1]:
+            shutil.rmtree(f'{root}{d}', ignore_errors=True)
+        print("Shared models exported")
+
+    def attach_shared_models(self, base_path='models/'):
+        """Map the exported RF arrays read-only; pages are shared across processes.
+
+        The LSTM is not attached: it is not used for predictions and a
+        TensorFlow graph cannot be shared this way. Refuses a stale export
+        whose fingerprint or feature columns no longer match ``base_path``.
+        """
+        with open(f'{base_path}shared/meta.json') as f:
+            meta = json.load(f)
+        if 'version' not in meta:
+            raise RuntimeError("Shared export predates versioning; re-run export_shared_models.")
+        src = f"{base_path}shared/{meta['version']}/"
+        if meta.get('feature_columns') != self.feature_columns:
+            raise RuntimeError("Shared export was built for different feature columns.")
+        current = model_fingerprint(base_path)
+        if current is not None and meta.get('fingerprint') != current:
+            raise RuntimeError(f"Shared export in {src} is stale; re-run export_shared_models.")
+
+        def mapped(name):
+            return np.load(f'{src}{name}.npy', mmap_mode='r')
+
+        self.model = SharedForest(
+            mapped('left'), mapped('right'), mapped('feature'),
+            mapped('threshold'), mapped('missing_go_to_left'),
+            mapped('value'), mapped('roots'),
+            meta['max_depth']
+        )
+        self.scaler = SharedScaler(mapped('scaler_mean'), mapped('scaler_scale'))
+        self.lstm_model = None
+        print("Shared models attached")
+
     def load_models(self, base_path='models/'):
         try:
-            self.rf_model = joblib.load(f'{base_path}rf_irrigation_model.pkl')
+            self.model = joblib.load(f'{base_path}rf_irrigation_model.pkl')
             self.scaler = joblib.load(f'{base_path}feature_scaler.pkl')
-            self.lstm_model = keras.models.load_model(f'{base_path}lstm_irrigation_model.h5')
+            if os.path.exists(f'{base_path}model_benchmark.json'):
+                with open(f'{base_path}model_benchmark.json') as f:
+                    report = json.load(f)
+                if report.get('fingerprint') == model_fingerprint(base_path):
+                    self.benchmark_report = report
+                    self.backend = report['selected']
+                else:
+                    print("Ignoring stale model_benchmark.json")
+            if TF_AVAILABLE:
+                self.lstm_model = keras.models.load_model(f'{base_path}lstm_irrigation_model.h5')
             print("Models loaded")
         except Exception as e:
             print("Error loading models:", e)
 
 
-# WeatherService omitted for brevity...
+class FileWeatherProvider:
+    """Forecast provider backed by a local JSON file.
+
+    The file holds a list of ``{"lat", "lon", "rainfall_24h"}`` points; each
+    requested cell gets the rainfall of its nearest point.
+    """
+
+    def __init__(self, path):
+        with open(path) as f:
+            points = json.load(f)
+        self.coords = np.array([[p['lat'], p['lon']] for p in points], dtype=float).reshape(-1, 2)
+        self.rainfall = np.array([p['rainfall_24h'] for p in points], dtype=float)
+
+    def fetch_forecasts(self, cells):
+        if not len(self.rainfall):
+            return [0.0] * len(cells)
+        query = np.asarray(cells, dtype=float).reshape(-1, 2)
+        dist = ((query[:, None, :] - self.coords[None, :, :]) ** 2).sum(axis=2)
+        return self.rainfall[dist.argmin(axis=1)].tolist()
+
+
+class HttpWeatherProvider:
+    """Forecast provider that asks an HTTP endpoint for many cells at once.
+
+    POSTs ``{"cells": [{"lat", "lon"}, ...]}`` and expects
+    ``{"forecasts": [rainfall_24h, ...]}`` in the same order.
+    """
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch_forecasts(self, cells):
+        r = requests.post(self.url, json={
+            'cells': [{'lat': lat, 'lon': lon} for lat, lon in cells]
+        }, timeout=self.timeout)
+        r.raise_for_status()
+        payload = r.json()
+        forecasts = payload.get('forecasts') if isinstance(payload, dict) else None
+        if not isinstance(forecasts, list):
+            raise ValueError("Forecast response has no 'forecasts' list")
+        if len(forecasts) != len(cells):
+            raise ValueError(f"Expected {len(cells)} forecasts, got {len(forecasts)}")
+        if not all(isinstance(x, (int, float)) for x in forecasts):
+            raise ValueError("Forecast response has non-numeric values")
+        return [float(x) for x in forecasts]
+
+
+class WeatherService:
+    """Batched, cached rainfall forecasts for a grid of fields.
+
+    Fields are snapped to geo-cells of ``cell_size`` degrees. Forecasts are
+    cached per (cell, time bucket) and evicted after ``ttl_seconds``; all
+    cache misses in a call are fetched from the provider in one request.
+    """
+
+    def __init__(self, provider, cell_size=0.1, bucket_seconds=3600,
+                 ttl_seconds=3600, clock=time.time):
+        self.provider = provider
+        self.cell_size = cell_size
+        self.bucket_seconds = bucket_seconds
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._cache = {}
+
+    def cell_for(self, lat, lon):
+        size = self.cell_size
+        return (round((math.floor(lat / size) + 0.5) * size, 6),
+                round((math.floor(lon / size) + 0.5) * size, 6))
+
+    def _evict_expired(self, now):
+        expired = [k for k, (_, expires) in self._cache.items() if expires <= now]
+        for k in expired:
+            del self._cache[k]
+
+    def get_rainfall(self, locations):
+        """Return rainfall_24h for each ``(lat, lon)`` in ``locations``."""
+        now = self.clock()
+        self._evict_expired(now)
+        bucket = int(now // self.bucket_seconds)
+        cells = [self.cell_for(lat, lon) for lat, lon in locations]
+        missing = sorted({c for c in cells if (c, bucket) not in self._cache})
+        fetched = {}
+        if missing:
+            try:
+                fetched = dict(zip(missing, self.provider.fetch_forecasts(missing)))
+            except (OSError, ValueError) as e:
+                # Provider I/O, HTTP (RequestException is an OSError) or payload
+                # errors fall back to the no-forecast default without caching it
+                print("Error fetching forecasts:", e, file=sys.stderr)
+            for cell, rain in fetched.items():
+                self._cache[(cell, bucket)] = (rain, now + self.ttl_seconds)
+        out = []
+        for c in cells:
+            if (c, bucket) in self._cache:
+                out.append(self._cache[(c, bucket)][0])
+            else:
+                out.append(fetched.get(c, 0.0))
+        return out
+
+    def fill_forecasts(self, records):
+        """Set the rainfall forecast on records that carry a ``location`` but none.
+
+        Nested records get ``weather_data['rainfall_24h']``, flat rows get
+        ``rainfall_forecast``. All lookups go through a single ``get_rainfall``.
+        """
+        targets = []
+        for rec in records:
+            if not isinstance(rec, dict) or not isinstance(rec.get('location'), dict):
+                continue
+            if 'sensor_data' in rec:
+                weather = rec.get('weather_data', {})
+                if not isinstance(weather, dict) or 'rainfall_24h' in weather:
+                    continue
+            elif 'rainfall_forecast' in rec:
+                continue
+            loc = rec['location']
+            try:
+                lat, lon = float(loc['lat']), float(loc['lon'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            # NaN/Infinity parse as floats but cannot be snapped to a cell
+            if not (math.isfinite(lat) and math.isfinite(lon)
+                    and abs(lat) <= 90 and abs(lon) <= 180):
+                continue
+            targets.append((rec, (lat, lon)))
+        if not targets:
+            return records
+        rainfall = self.get_rainfall([loc for _, loc in targets])
+        for (rec, _), rain in zip(targets, rainfall):
+            if 'sensor_data' in rec:
+                rec.setdefault('weather_data', {})['rainfall_24h'] = rain
+            else:
+                rec['rainfall_forecast'] = rain
+        return records
+
+
+def iter_ndjson_chunks(stream, chunk_size):
+    """Yield lists of ``(record, error)`` pairs parsed from an NDJSON stream.
+
+    Blank lines are skipped and produce no output; a line that fails to
+    parse keeps its slot with the error message so output lines stay
+    aligned with the non-blank input lines.
+    """
+    chunk = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            chunk.append((json.loads(line), None))
+        except ValueError as e:
+            chunk.append((None, f"invalid JSON: {e}"))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _read_npy_header(fp):
+    version = np.lib.format.read_magic(fp)
+    if version == (1, 0):
+        return np.lib.format.read_array_header_1_0(fp)
+    return np.lib.format.read_array_header_2_0(fp)
+
+
+def open_columnar_chunks(source, feature_columns, chunk_size):
+    """Validate an ``.npz`` with one 1-D array per feature and stream it in chunks.
+
+    ``source`` is a path or binary file object. Only the array headers are
+    read up front (names, dtypes, equal lengths); the data is then read from
+    each archive member ``chunk_size`` rows at a time. Returns ``(n_rows,
+    chunks)`` where ``chunks`` yields column dicts.
+    """
+    archive = zipfile.ZipFile(source)
+    try:
+        names = set(archive.namelist())
+        missing = [c for c in feature_columns if f'{c}.npy' not in names]
+        if missing:
+            raise ValueError(f"Columnar input missing columns: {missing}")
+        streams, dtypes, lengths = {}, {}, {}
+        for c in feature_columns:
+            fp = archive.open(f'{c}.npy')
+            shape, fortran_order, dtype = _read_npy_header(fp)
+            if len(shape) != 1 or dtype.hasobject:
+                raise ValueError(f"Column '{c}' must be a 1-D numeric array, got {shape} {dtype}")
+            streams[c], dtypes[c], lengths[c] = fp, dtype, shape[0]
+        if len(set(lengths.values())) > 1:
+            raise ValueError(f"Columnar input columns differ in length: {lengths}")
+    except Exception:
+        archive.close()
+        raise
+    n_rows = lengths[feature_columns[0]]
+
+    def chunks():
+        try:
+            for start in range(0, n_rows, chunk_size):
+                n = min(chunk_size, n_rows - start)
+                yield {c: np.frombuffer(streams[c].read(n * dtypes[c].itemsize), dtype=dtypes[c])
+                       for c in feature_columns}
+        finally:
+            archive.close()
+
+    return n_rows, chunks()
+
+
+def _predict_rows(predictor, features):
+    """Score ``features`` in one call; if the model rejects the batch, score
+    row by row so only the offending rows get an error result."""
+    row_errors = (AttributeError, KeyError, TypeError, ValueError)
+    try:
+        return predictor.predict_batch(features)
+    except row_errors:
+        preds = []
+        for j in range(len(features)):
+            try:
+                preds.append(predictor.predict_batch(features.iloc[j:j + 1])[0])
+            except row_errors as e:
+                preds.append({'error': f"{type(e).__name__}: {e}"})
+        return preds
+
+
+def score_ndjson(predictor, stream, out, chunk_size=10000, weather_service=None):
+    """Score NDJSON records from ``stream`` and write NDJSON results to ``out``.
+
+    Features are built per record, so a bad record only fills its own slot
+    with an error and the rest of the chunk is still scored in one model
+    call. With a ``weather_service``, records that carry a ``location`` but
+    no rainfall get their forecast filled in with one lookup per chunk.
+    """
+    row_errors = (AttributeError, KeyError, TypeError, ValueError)
+    for chunk in iter_ndjson_chunks(stream, chunk_size):
+        results = [None] * len(chunk)
+        if weather_service is not None:
+            weather_service.fill_forecasts([rec for rec, err in chunk if err is None])
+        rows, scored = [], []
+        for i, (rec, err) in enumerate(chunk):
+            if err is not None:
+                results[i] = {'error': err}
+                continue
+            try:
+                rows.append(predictor.record_row(rec))
+                scored.append(i)
+            except row_errors as e:
+                results[i] = {'error': f"{type(e).__name__}: {e}"}
+        if rows:
+            features = pd.DataFrame(rows, columns=predictor.feature_columns)
+            for i, res in zip(scored, _predict_rows(predictor, features)):
+                results[i] = res
+        for res in results:
+            out.write(json.dumps(res) + "\n")
+        out.flush()
+
+
+def score_columnar(predictor, chunks, out):
+    """Score column-dict ``chunks`` and write NDJSON results to ``out``."""
+    for columns in chunks:
+        features = pd.DataFrame(columns, columns=predictor.feature_columns)
+        for res in _predict_rows(predictor, features):
+            out.write(json.dumps(res) + "\n")
+        out.flush()
 
 
 if __name__ == "__main__":
-    import sys, ast
+    import argparse, contextlib
 
-    # 1) Instantiate and load models
-    predictor = IrrigationPredictor()
-    predictor.load_models(base_path="models/")
+    parser = argparse.ArgumentParser(
+        description="Score irrigation records as a stream (NDJSON in, NDJSON out).")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="NDJSON file, .npz columnar file, or '-' for stdin. A columnar "
+                             "file is streamed chunk by chunk; columnar stdin is buffered "
+                             "in memory whole before scoring")
+    parser.add_argument("--format", choices=["auto", "ndjson", "columnar"], default="auto",
+                        help="Input format (auto: .npz is columnar, anything else "
+                             "NDJSON; use 'columnar' for .npz on stdin)")
+    parser.add_argument("--chunk-size", type=int, default=10000,
+                        help="Records scored per model call")
+    parser.add_argument("--models", default="models/", help="Model directory")
+    parser.add_argument("--shared", action="store_true",
+                        help="Attach memory-mapped models from <models>/shared/ "
+                             "(create them with export_shared_models)")
+    parser.add_argument("--weather-file",
+                        help="JSON forecast points used to fill missing rainfall by location")
+    parser.add_argument("--weather-url",
+                        help="Batch forecast endpoint used to fill missing rainfall by location")
+    parser.add_argument("--weather-ttl", type=float, default=3600,
+                        help="Seconds a cached forecast stays valid")
+    args = parser.parse_args()
+
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "columnar" if args.input.endswith(".npz") else "ndjson"
+    if args.weather_file and args.weather_url:
+        parser.error("use only one of --weather-file and --weather-url")
+
+    weather_service = None
+    if args.weather_file:
+        weather_service = WeatherService(FileWeatherProvider(args.weather_file),
+                                         ttl_seconds=args.weather_ttl)
+    elif args.weather_url:
+        weather_service = WeatherService(HttpWeatherProvider(args.weather_url),
+                                         ttl_seconds=args.weather_ttl)
 
-    # 2) Read input argument
-    if len(sys.argv) < 2:
-        print("Error: Provide input dict")
+    # 1) Instantiate and load models once; keep stdout clean for NDJSON
+    predictor = IrrigationPredictor()
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.shared:
+            predictor.attach_shared_models(base_path=args.models)
+        else:
+            predictor.load_models(base_path=args.models)
+    if predictor.model is None:
+        print("Error: no model loaded from", args.models, file=sys.stderr)
         sys.exit(1)
-    inp = ast.literal_eval(sys.argv[1])
-    sensor = inp.get('sensor_data', {})
-    weather = inp.get('weather_data', {})
-    crop = inp.get('crop_info', {})
-
-    # 3) Predict and print result
-    result = predictor.predict_irrigation_need(
-        sensor_data=sensor,
-        weather_forecast=weather,
-        crop_info=crop
-    )
-    print(result)
+
+    # 2) Stream records through the model in chunks
+    if fmt == "columnar":
+        source = io.BytesIO(sys.stdin.buffer.read()) if args.input == "-" else args.input
+        try:
+            _, chunks = open_columnar_chunks(source, predictor.feature_columns, args.chunk_size)
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            print("Error: invalid columnar input:", e, file=sys.stderr)
+            sys.exit(1)
+        score_columnar(predictor, chunks, sys.stdout)
+    elif args.input == "-":
+        score_ndjson(predictor, sys.stdin, sys.stdout, args.chunk_size, weather_service)
+    else:
+        with open(args.input) as f:
+            score_ndjson(predictor, f, sys.stdout, args.chunk_size, weather_service)
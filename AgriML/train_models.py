@@ -11,15 +11,13 @@ firebase_admin.initialize_app(cred, {
 import os
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error, r2_score
-import joblib
 
 import firebase_admin
 from firebase_admin import credentials, db
 
+# Serving-side predictor: trains and benchmarks the candidate model backends
+from irrigation_ML import IrrigationPredictor as ServingPredictor
+
 # Try to import TensorFlow (optional); if not available, LSTM training is skipped.
 try:
     import tensorflow as tf
@@ -36,6 +34,10 @@ except Exception:
 SERVICE_KEY_PATH = "serviceAccountKey.json"   # make sure this file is present
 DB_URL = "https://precision-irrigation-dec40-default-rtdb.asia-southeast1.firebasedatabase.app"
 
+# p99 latency budget a backend must meet on this machine to be selected
+LATENCY_BUDGET_SINGLE_MS = 5.0     # one reading
+LATENCY_BUDGET_BATCH_MS = 100.0    # batch of 1000 readings
+
 if not os.path.exists(SERVICE_KEY_PATH):
     raise RuntimeError(f"Missing service account key file: {SERVICE_KEY_PATH}")
 
@@ -44,48 +46,17 @@ firebase_admin.initialize_app(cred, {'databaseURL': DB_URL})
 
 
 # ============================
-# Predictor class
+# LSTM trainer (tabular backends are trained by ServingPredictor)
 # ============================
 class IrrigationPredictor:
     def __init__(self):
-        self.rf_model = None
         self.lstm_model = None
-        self.scaler = StandardScaler()
         self.feature_columns = [
             'soil_moisture_avg', 'temperature', 'humidity',
             'light_intensity', 'rainfall_forecast', 'days_since_last_irrigation',
             'crop_stage', 'soil_type'
         ]
 
-    def train_random_forest(self, training_data):
-        X = training_data[self.feature_columns]
-        y = training_data['irrigation_duration']
-        n_samples = len(X)
-        if n_samples < 5:
-            raise RuntimeError(f"Not enough samples for training Random Forest (n={n_samples}). Need >= 5.")
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-
-        self.rf_model = RandomForestRegressor(n_estimators=100, max_depth=10,
-                                              random_state=42, min_samples_split=5)
-        self.rf_model.fit(X_train_scaled, y_train)
-
-        y_pred = self.rf_model.predict(X_test_scaled)
-        mse = mean_squared_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
-        print("Random Forest Model Performance:")
-        print(f"MSE: {mse:.3f}")
-        print(f"R2 Score: {r2:.3f}")
-
-        importance = pd.DataFrame({
-            'feature': self.feature_columns,
-            'importance': self.rf_model.feature_importances_
-        }).sort_values('importance', ascending=False)
-        print("\nFeature Importance:")
-        print(importance)
-        return self.rf_model
-
     def create_lstm_model(self, sequence_length, n_features):
         model = keras.Sequential([
             keras.Input(shape=(sequence_length, n_features)),
@@ -126,33 +97,6 @@ class IrrigationPredictor:
                             callbacks=[early_stopping], verbose=1)
         return self.lstm_model
 
-    def predict_irrigation_need(self, sensor_data, weather_data=None, crop_info=None):
-        """
-        sensor_data: dict with keys 'soil_moisture', 'temperature', 'humidity', 'light_intensity' (or lightIntensity)
-        weather_data: dict with key 'rainfall_forecast' (optional)
-        crop_info: dict with keys 'days_since_last_irrigation', 'crop_stage', 'soil_type' (optional)
-        """
-        if self.rf_model is None:
-            raise RuntimeError("RF model not trained yet.")
-
-        # build a single-row DataFrame with feature_columns
-        row = {}
-        row['soil_moisture_avg'] = float(sensor_data.get('soil_moisture', np.nan))
-        row['temperature'] = float(sensor_data.get('temperature', np.nan))
-        row['humidity'] = float(sensor_data.get('humidity', np.nan))
-        row['light_intensity'] = float(sensor_data.get('light_intensity', sensor_data.get('lightIntensity', 0)))
-        row['rainfall_forecast'] = float((weather_data or {}).get('rainfall_forecast', 0.0))
-        row['days_since_last_irrigation'] = float((crop_info or {}).get('days_since_last_irrigation',
-                                                                         (crop_info or {}).get('days_since_irrigation', 0.0)))
-        row['crop_stage'] = float((crop_info or {}).get('crop_stage', 0.0))
-        row['soil_type'] = float((crop_info or {}).get('soil_type', 0.0))
-
-        df_row = pd.DataFrame([row], columns=self.feature_columns)
-        X_scaled = self.scaler.transform(df_row)
-        pred = self.rf_model.predict(X_scaled)
-        return float(pred[0])
-
-
 # ============================
 # Fetching and cleaning data
 # ============================
@@ -229,12 +173,22 @@ def main():
         return
 
     try:
-        print("Training Random Forest model...")
-        predictor.train_random_forest(training_df)
-
-        print("Saving RF model and scaler...")
-        joblib.dump(predictor.rf_model, 'models/rf_irrigation_model.pkl')
-        joblib.dump(predictor.scaler, 'models/feature_scaler.pkl')
+        print("Training model backends and selecting within the latency budget...")
+        selector = ServingPredictor()
+        selector.train_backends(training_df,
+                                single_p99_ms=LATENCY_BUDGET_SINGLE_MS,
+                                batch_p99_ms=LATENCY_BUDGET_BATCH_MS)
+
+        if hasattr(selector.model, 'feature_importances_'):
+            importance = pd.DataFrame({
+                'feature': selector.feature_columns,
+                'importance': selector.model.feature_importances_
+            }).sort_values('importance', ascending=False)
+            print("\nFeature Importance:")
+            print(importance)
+
+        print(f"Saving {selector.backend} model, scaler and benchmark report...")
+        selector.save_models(base_path='models/')
 
         if TF_AVAILABLE:
             seq_len = 12
@@ -248,26 +202,10 @@ def main():
         else:
             print("Skipping LSTM training because TensorFlow is not available.")
 
-        # Example RF prediction using last_record:
-        last_record = training_df.iloc[-1]
-        sensor_data = {
-            'soil_moisture': last_record['soil_moisture_avg'],
-            'temperature': last_record['temperature'],
-            'humidity': last_record['humidity'],
-            'light_intensity': last_record['light_intensity']
-        }
-        weather_data = {'rainfall_forecast': last_record.get('rainfall_forecast', 0.0)}
-        crop_info = {
-            'growth_stage': last_record.get('crop_stage', 0.0),
-            'days_since_last_irrigation': last_record.get('days_since_last_irrigation', 0.0),
-            'soil_type': last_record.get('soil_type', 0.0)
-        }
-
-        if predictor.rf_model is not None:
-            pred = predictor.predict_irrigation_need(sensor_data, weather_data, crop_info)
-            print(f"\nExample RF prediction (minutes irrigation): {pred:.2f}")
-        else:
-            print("RF model not available for example prediction.")
+        # Example prediction with the selected backend using last_record:
+        last_record = training_df[selector.feature_columns].iloc[[-1]]
+        pred = float(selector.model.predict(selector.scaler.transform(last_record))[0])
+        print(f"\nExample {selector.backend} prediction (minutes irrigation): {pred:.2f}")
 
     except Exception as e:
         print("Training failed:", e)